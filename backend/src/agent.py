@@ -1,7 +1,9 @@
 # agent.py  (Day 10 - corrected: _unused -> unused)
+import functools
 import logging
 import json
-from datetime import datetime
+import os
+import time
 from dotenv import load_dotenv
 
 from livekit.agents import (
@@ -16,15 +18,42 @@ from livekit.agents import (
     metrics,
     tokenize,
     function_tool,
+    llm,
     RunContext,
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
+from livekit.plugins import murf, silero, google, deepgram, noise_cancellation, openai
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
 logger = logging.getLogger("agent")
 load_dotenv(".env.local")
 
 
+# -----------------------------
+# Helper: UTC ISO-8601 timestamps
+# -----------------------------
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") of the last formatted timestamp, so the
+# strftime work is done at most once per second.
+_last_iso_second = (None, "")
+
+
+def _iso_now() -> str:
+    """Return the current UTC time as e.g. '2025-11-30T17:54:19.123456Z'."""
+    global _last_iso_second
+    t = time.time()
+    sec = int(t)
+    if _last_iso_second[0] != sec:
+        _last_iso_second = (sec, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec)))
+    return f"{_last_iso_second[1]}.{int((t - sec) * 1e6):06d}Z"
+
+
+# -----------------------------
+# Helper: compact JSON for tool responses
+# -----------------------------
+# Compact separators, and non-ASCII text (e.g. the em dashes in the scenarios)
+# kept as-is rather than expanded to \uXXXX escapes the LLM has to read back.
+_dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+
 # -----------------------------
 # Helper: default improv scenarios
 # -----------------------------
@@ -35,13 +64,16 @@ DEFAULT_SCENARIOS = [
     "You are a detective trying to interrogate a suspect who only answers in song lyrics. Keep the interrogation focused.",
     "You are a waiter apologizing because the customer's order has literally run away. Explain what happened and try to offer a replacement."
 ]
+_NUM_SCENARIOS = len(DEFAULT_SCENARIOS)
 
 
-class ImprovHost(Agent):
-    def __init__(self, max_rounds: int = 3) -> None:
-        # System prompt defines the improv-host persona and rules
-        super().__init__(
-            instructions=f"""
+# -----------------------------
+# Helper: improv host system prompt
+# -----------------------------
+@functools.lru_cache(maxsize=8)
+def _improv_prompt(max_rounds: int) -> str:
+    # Cached so constructing an ImprovHost doesn't re-format the prompt each time.
+    return f"""
 You are the host of a high-energy TV improv show called "Improv Battle".
 Your persona:
 - Energetic, witty, playful, sometimes teasing, always respectful.
@@ -67,7 +99,12 @@ STRUCTURE & RULES:
 
 IMPORTANT: Use the provided tools (get_next_scenario and save_reaction) to manage the backend state. Do not invent the state format — follow the tool responses exactly.
 """
-        )
+
+
+class ImprovHost(Agent):
+    def __init__(self, max_rounds: int = 3) -> None:
+        # System prompt defines the improv-host persona and rules
+        super().__init__(instructions=_improv_prompt(max_rounds))
         # session state (per-agent instance)
         self.improv_state = {
             "player_name": None,
@@ -88,24 +125,26 @@ IMPORTANT: Use the provided tools (get_next_scenario and save_reaction) to manag
         The LLM should call this to get the scenario text to read to the player.
         Response format: {"scenario": "<text>", "round_number": n}
         """
-        if self.improv_state["current_round"] >= self.improv_state["max_rounds"]:
-            return json.dumps({"error": "no_more_rounds"})
+        state = self.improv_state
+        cur = state["current_round"]
+        if cur >= state["max_rounds"]:
+            return _dumps({"error": "no_more_rounds"})
 
         # pick scenario (cycle through defaults)
-        idx = self.improv_state["current_round"] % len(DEFAULT_SCENARIOS)
-        scenario = DEFAULT_SCENARIOS[idx]
+        scenario = DEFAULT_SCENARIOS[cur % _NUM_SCENARIOS]
 
         # increment current_round and set phase
-        self.improv_state["current_round"] += 1
-        self.improv_state["phase"] = "awaiting_improv"
-        if not self.improv_state["started_at"]:
-            self.improv_state["started_at"] = datetime.utcnow().isoformat() + "Z"
+        cur += 1
+        state["current_round"] = cur
+        state["phase"] = "awaiting_improv"
+        if not state["started_at"]:
+            state["started_at"] = _iso_now()
 
         response = {
             "scenario": scenario,
-            "round_number": self.improv_state["current_round"],
+            "round_number": cur,
         }
-        return json.dumps(response)
+        return _dumps(response)
 
     # -----------------------------
     # TOOL: save_reaction
@@ -125,24 +164,26 @@ IMPORTANT: Use the provided tools (get_next_scenario and save_reaction) to manag
         try:
             payload = json.loads(reaction_json)
         except Exception as e:
-            return json.dumps({"error": "invalid_json", "message": str(e)})
+            return _dumps({"error": "invalid_json", "message": str(e)})
 
         # build round record
         entry = {
             "scenario": payload.get("scenario"),
             "player_excerpt": payload.get("player_excerpt"),
             "host_reaction": payload.get("host_reaction"),
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": _iso_now(),
         }
-        self.improv_state["rounds"].append(entry)
+        state = self.improv_state
+        rounds = state["rounds"]
+        rounds.append(entry)
         # after saving reaction, set phase depending on outcome
         outcome = payload.get("outcome", "continue")
-        if outcome == "stop" or self.improv_state["current_round"] >= self.improv_state["max_rounds"]:
-            self.improv_state["phase"] = "done"
+        if outcome == "stop" or state["current_round"] >= state["max_rounds"]:
+            state["phase"] = "done"
         else:
-            self.improv_state["phase"] = "reacting"
+            state["phase"] = "reacting"
 
-        return json.dumps({"saved": True, "round_index": len(self.improv_state["rounds"]) - 1})
+        return _dumps({"saved": True, "round_index": len(rounds) - 1})
 
     # -----------------------------
     # Optional helper: retrieve state (not exposed as a tool by default)
@@ -151,8 +192,45 @@ IMPORTANT: Use the provided tools (get_next_scenario and save_reaction) to manag
         return self.improv_state
 
 
+@functools.cache
+def get_vad() -> silero.VAD:
+    # one set of VAD weights per process, however many times prewarm runs
+    return silero.VAD.load()
+
+
+def _require_env(name: str, backend: str) -> str:
+    value = os.getenv(name)
+    if not value:
+        raise ValueError(f"{name} is required when LLM_BACKEND={backend}")
+    return value
+
+
+def build_llm() -> llm.LLM:
+    """
+    Build the chat LLM from the environment:
+      LLM_BACKEND=gemini (default)  -> Google Gemini, model LLM_MODEL (default gemini-2.5-flash)
+      LLM_BACKEND=openai            -> any OpenAI-compatible server (e.g. vLLM serving a
+                                       quantized model) at LLM_BASE_URL, model LLM_MODEL
+    """
+    backend = (os.getenv("LLM_BACKEND") or "gemini").lower()
+    if backend == "gemini":
+        return google.LLM(model=os.getenv("LLM_MODEL") or "gemini-2.5-flash")
+    if backend == "openai":
+        return openai.LLM(
+            model=_require_env("LLM_MODEL", backend),
+            base_url=_require_env("LLM_BASE_URL", backend),
+            # self-hosted servers usually ignore the key, but a real OpenAI-compatible
+            # endpoint needs one, so fall back to the standard OPENAI_API_KEY
+            api_key=(
+                os.getenv("LLM_API_KEY") or os.getenv("OPENAI_API_KEY") or "not-needed"
+            ),
+        )
+    raise ValueError(f"unknown LLM_BACKEND: {backend!r}")
+
+
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    proc.userdata["vad"] = get_vad()
+    proc.userdata["nc"] = noise_cancellation.BVC()
 
 
 async def entrypoint(ctx: JobContext):
@@ -160,7 +238,7 @@ async def entrypoint(ctx: JobContext):
     ctx.log_context_fields = {"room": ctx.room.name}
     session = AgentSession(
         stt=deepgram.STT(model="nova-3"),
-        llm=google.LLM(model="gemini-2.5-flash"),
+        llm=build_llm(),
         tts=murf.TTS(
             voice="en-US-matthew",
             style="Promo",
@@ -170,6 +248,12 @@ async def entrypoint(ctx: JobContext):
         turn_detection=MultilingualModel(),
         vad=ctx.proc.userdata["vad"],
         preemptive_generation=True,
+        # deliberately lowered from the 0.5s default for faster replies, but kept
+        # well above the ~0.05s used for quick back-and-forth flows since players
+        # pause mid-monologue
+        min_endpointing_delay=0.3,
+        # ignore short noises/laughs as barge-ins while the host is speaking
+        min_interruption_duration=0.6,
     )
 
     usage_collector = metrics.UsageCollector()
@@ -180,7 +264,7 @@ async def entrypoint(ctx: JobContext):
         usage_collector.collect(ev.metrics)
 
     async def log_usage():
-        logger.info(f"Usage: {usage_collector.get_summary()}")
+        logger.info("Usage: %s", usage_collector.get_summary())
 
     ctx.add_shutdown_callback(log_usage)
 
@@ -189,7 +273,7 @@ async def entrypoint(ctx: JobContext):
         agent=ImprovHost(max_rounds=3),
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=ctx.proc.userdata["nc"],
         ),
     )
 
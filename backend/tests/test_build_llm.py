@@ -0,0 +1,119 @@
+from typing import Optional
+
+import pytest
+
+import agent
+from agent import build_llm
+
+
+class _FakeLLM:
+    def __init__(self, **kwargs) -> None:
+        self.kwargs = kwargs
+
+
+@pytest.fixture(autouse=True)
+def _fake_plugins(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Swap the plugin LLM classes for recorders so no client is built."""
+    monkeypatch.setattr(agent.google, "LLM", type("GoogleLLM", (_FakeLLM,), {}))
+    monkeypatch.setattr(agent.openai, "LLM", type("OpenAILLM", (_FakeLLM,), {}))
+    for name in (
+        "LLM_BACKEND",
+        "LLM_MODEL",
+        "LLM_BASE_URL",
+        "LLM_API_KEY",
+        "OPENAI_API_KEY",
+    ):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_defaults_to_gemini() -> None:
+    result = build_llm()
+
+    assert type(result).__name__ == "GoogleLLM"
+    assert result.kwargs == {"model": "gemini-2.5-flash"}
+
+
+def test_empty_env_values_fall_back_to_defaults(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # .env.example ships these keys with empty values
+    monkeypatch.setenv("LLM_BACKEND", "")
+    monkeypatch.setenv("LLM_MODEL", "")
+
+    result = build_llm()
+
+    assert type(result).__name__ == "GoogleLLM"
+    assert result.kwargs == {"model": "gemini-2.5-flash"}
+
+
+def test_gemini_model_override(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("LLM_BACKEND", "Gemini")
+    monkeypatch.setenv("LLM_MODEL", "gemini-2.5-flash-lite")
+
+    result = build_llm()
+
+    assert type(result).__name__ == "GoogleLLM"
+    assert result.kwargs == {"model": "gemini-2.5-flash-lite"}
+
+
+def test_openai_compatible_backend(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("LLM_BACKEND", "openai")
+    monkeypatch.setenv("LLM_MODEL", "llama-3.2-3b-instruct-w4a16")
+    monkeypatch.setenv("LLM_BASE_URL", "http://localhost:8000/v1")
+
+    result = build_llm()
+
+    assert type(result).__name__ == "OpenAILLM"
+    assert result.kwargs == {
+        "model": "llama-3.2-3b-instruct-w4a16",
+        "base_url": "http://localhost:8000/v1",
+        "api_key": "not-needed",
+    }
+
+
+@pytest.mark.parametrize(
+    ("llm_api_key", "openai_api_key", "expected"),
+    [
+        ("llm-key", "openai-key", "llm-key"),
+        (None, "openai-key", "openai-key"),
+        ("", "openai-key", "openai-key"),
+    ],
+)
+def test_openai_backend_api_key_precedence(
+    monkeypatch: pytest.MonkeyPatch,
+    llm_api_key: Optional[str],
+    openai_api_key: str,
+    expected: str,
+) -> None:
+    monkeypatch.setenv("LLM_BACKEND", "openai")
+    monkeypatch.setenv("LLM_MODEL", "gpt-4.1-mini")
+    monkeypatch.setenv("LLM_BASE_URL", "https://api.openai.com/v1")
+    monkeypatch.setenv("OPENAI_API_KEY", openai_api_key)
+    if llm_api_key is not None:
+        monkeypatch.setenv("LLM_API_KEY", llm_api_key)
+
+    result = build_llm()
+
+    assert result.kwargs["api_key"] == expected
+
+
+@pytest.mark.parametrize("missing", ["LLM_MODEL", "LLM_BASE_URL"])
+def test_openai_backend_requires_model_and_base_url(
+    monkeypatch: pytest.MonkeyPatch, missing: str
+) -> None:
+    monkeypatch.setenv("LLM_BACKEND", "openai")
+    monkeypatch.setenv("LLM_MODEL", "some-model")
+    monkeypatch.setenv("LLM_BASE_URL", "http://localhost:8000/v1")
+    monkeypatch.setenv(missing, "")
+
+    with pytest.raises(
+        ValueError, match=f"{missing} is required when LLM_BACKEND=openai"
+    ):
+        build_llm()
+
+
+def test_unknown_backend(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("LLM_BACKEND", "bogus")
+
+    with pytest.raises(ValueError, match="unknown LLM_BACKEND: 'bogus'"):
+        build_llm()